@@ -53,26 +53,26 @@ class DisclosureType(TypedDict, total=False):
 DisclosureCollectionType = TypedDict(
     "DisclosureCollectionType",
     {
-        "@": "MetadataType",
-        "Automattic": "DisclosureType",
-        "Discord": "DisclosureType",
-        "Facebook": "DisclosureType",
-        "Google": "DisclosureType",
-        "Instagram": "DisclosureType",
-        "LinkedIn": "DisclosureType",
-        "Meta": "DisclosureType",
-        "Microsoft": "DisclosureType",
-        "Pinterest": "DisclosureType",
-        "Quora": "DisclosureType",
-        "Reddit": "DisclosureType",
-        "Snap": "DisclosureType",
+        "@": MetadataType,
+        "Automattic": DisclosureType,
+        "Discord": DisclosureType,
+        "Facebook": DisclosureType,
+        "Google": DisclosureType,
+        "Instagram": DisclosureType,
+        "LinkedIn": DisclosureType,
+        "Meta": DisclosureType,
+        "Microsoft": DisclosureType,
+        "Pinterest": DisclosureType,
+        "Quora": DisclosureType,
+        "Reddit": DisclosureType,
+        "Snap": DisclosureType,
         "Telegram": None,
-        "TikTok": "DisclosureType",
-        "Tumblr": "DisclosureType",
-        "Twitter": "DisclosureType",
-        "WhatsApp": "DisclosureType",
-        "Wordpress": "DisclosureType",
-        "YouTube": "DisclosureType",
-        "NCMEC": "DisclosureType",
+        "TikTok": DisclosureType,
+        "Tumblr": DisclosureType,
+        "Twitter": DisclosureType,
+        "WhatsApp": DisclosureType,
+        "Wordpress": DisclosureType,
+        "YouTube": DisclosureType,
+        "NCMEC": DisclosureType,
     },
 )
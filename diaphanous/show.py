@@ -1,14 +1,22 @@
 from collections.abc import Iterator
-import math
+from html import escape
 from pathlib import Path
-from typing import cast, NamedTuple, TypeAlias
+import sys
+from typing import cast, NamedTuple, TYPE_CHECKING, TypeAlias
 
 from IPython.display import display, HTML
 import numpy as np
 import pandas as pd
 
 from pandas.api.types import is_numeric_dtype
-from pandas.io.formats.style import Styler
+
+# Styler pulls in Jinja2. Since frame.style imports it on first use anyway, only
+# import it here for type checking.
+if TYPE_CHECKING:
+    from pandas.io.formats.style import Styler
+    from pandas.io.formats.style_render import CSSDict
+
+from .terminal import is_reports_table
 
 Dtype: TypeAlias = np.dtype | pd.api.extensions.ExtensionDtype
 
@@ -45,24 +53,20 @@ def show(
         value = value.to_frame()
 
     if show_schema:
-        caption = 'Table ' + '' if caption is None else f'<strong>{caption}</strong> '
-        caption += f'with {value.shape[0]} rows'
+        rows = value.shape[0]
+        if caption is None:
+            caption = f'Table with {rows} rows'
+        else:
+            caption = f'Table <strong>{caption}</strong> with {rows} rows'
 
         schema = to_schema(value)
-        style = format_table(
-            schema,
-            caption=caption,
-            show_column_header=False,
-            show_row_header=False,
-            margin_bottom=margin_bottom,
+        display(
+            HTML(format_schema(schema, caption=caption, margin_bottom=margin_bottom))
         )
-        style = format_schema(style)
-        display(style)
         return
 
-    columns = value.columns
-    is_reports_table = 'reports' in columns and 'Δ%' in columns and 'NCMEC' in columns
-    if is_reports_table and lowlight_columns is None:
+    has_reports = is_reports_table(value)
+    if has_reports and lowlight_columns is None:
         lowlight_columns = ['esp%', 'esp', 'total', 'esp/total%']
 
     style = format_table(
@@ -77,7 +81,7 @@ def show(
         show_row_header=with_index,
     )
 
-    if is_reports_table:
+    if has_reports:
         style = highlight_magnitude(
             value,
             style,
@@ -99,7 +103,7 @@ def show(
 
     # Restyle without colors.
     style = format_table(value, caption=caption, show_row_header=with_index)
-    if is_reports_table:
+    if has_reports:
         style.format('≡', subset=pd.IndexSlice[
             pd.IndexSlice[value['reports'] == value['NCMEC']], 'Δ%'
         ])
@@ -120,23 +124,58 @@ def show(
 
 
 def to_schema(frame: pd.DataFrame) -> pd.DataFrame:
-    schema = []
-    for vertical in all_verticals(frame):
-        schema.append(
-            [
-                'index' if vertical.kind == 'index' else 'column',
-                vertical.name or '',
-                ':',
-                vertical.dtype,
-                vertical.data.isna().sum(),
-            ]
-        )
-    return pd.DataFrame(schema, columns=['kind', 'name', 'dtype', '', 'nulls'])
+    # Count the nulls of all index levels and all columns upfront. Since
+    # all_verticals() yields index levels before columns, both in order, the
+    # counts line up with the verticals.
+    index = frame.index
+    index_nulls = [
+        index.get_level_values(level).isna().sum() for level in range(index.nlevels)
+    ]
+    column_nulls = frame.isna().sum().to_numpy(dtype=np.int64)
+    nulls = np.concatenate((np.array(index_nulls, dtype=np.int64), column_nulls))
+
+    verticals = list(all_verticals(frame))
+    # Schemas repeat the same few dtype names, so intern them.
+    dtypes = [sys.intern(str(v.dtype)) for v in verticals]
+    return pd.DataFrame(
+        {
+            'kind': [v.kind for v in verticals],
+            'name': [v.name or '' for v in verticals],
+            '': ':',
+            'dtype': np.array(dtypes, dtype=object),
+            'nulls': nulls,
+        }
+    )
 
 
 # --------------------------------------------------------------------------------------
 
 
+# The static parts of the CSS applied by format_table().
+_CAPTION_PROPS: tuple[tuple[str, str], ...] = (
+    ('caption-side', 'top'),
+    ('font-size', '1.1em'),
+    ('margin-bottom', '2ex'),
+    ('vertical-align', 'center'),
+)
+_ITALIC_CAPTION_PROPS: tuple[tuple[str, str], ...] = (
+    *_CAPTION_PROPS,
+    ('font-style', 'italic'),
+)
+_ALIGN_START_PROPS: tuple[tuple[str, str], ...] = (('text-align', 'start'),)
+_TABLE_CSS = 'font-variant-numeric: tabular-nums;'
+_LOWLIGHT_STYLES: 'list[CSSDict]' = [{'selector': '', 'props': [('color', '#999')]}]
+_HIGHLIGHT_ROW_STYLES: 'list[CSSDict]' = [
+    {'selector': '', 'props': [('background-color', '#feddb0')]}
+]
+
+
+def _caption_props(caption: str) -> tuple[tuple[str, str], ...]:
+    if '<strong>' not in caption and '<em>' not in caption:
+        return _ITALIC_CAPTION_PROPS
+    return _CAPTION_PROPS
+
+
 def format_table(
     frame: pd.DataFrame,
     *,
@@ -149,21 +188,14 @@ def format_table(
     margin_top: float = 0,
     margin_bottom: float = 2,
     min_precision: int = 1,
-) -> Styler:
+) -> 'Styler':
     style = frame.style
     table_styles = []
 
     # Add caption
     if caption is not None:
         style.set_caption(caption)
-        props = [
-            ('caption-side', 'top'),
-            ('font-size', '1.1em'),
-            ('margin-bottom', '2ex'),
-            ('vertical-align', 'center'),
-        ]
-        if '<strong>' not in caption and '<em>' not in caption:
-            props.append(('font-style', 'italic'))
+        props = list(_caption_props(caption))
         table_styles.append({'selector': 'caption', 'props': props})
 
     # Suppress row and/or column headers
@@ -173,47 +205,48 @@ def format_table(
     if not show_column_header:
         style.hide(subset=None, level=None, names=False, axis=1)
 
+    # Enumerate columns once and reuse them for alignment and precision.
+    columns = list(all_columns(frame))
+
     # Handle alignment
-    select_verticals = all_verticals if show_row_header else all_columns
-    align_left = ','.join(
-        v.selector for v in select_verticals(frame) if not is_numeric_dtype(v.dtype)
-    )
+    verticals = [*all_levels(frame), *columns] if show_row_header else columns
+    # Classify each distinct dtype only once, since wide frames repeat dtypes.
+    dtypes = {v.dtype for v in verticals}
+    is_numeric = {dtype: is_numeric_dtype(dtype) for dtype in dtypes}
+    align_left = ','.join(v.selector for v in verticals if not is_numeric[v.dtype])
     if len(align_left) > 0:
-        table_styles.append(
-            {
-                'selector': align_left,
-                'props': [('text-align', 'start')],
-            }
-        )
+        table_styles.append({'selector': align_left, 'props': list(_ALIGN_START_PROPS)})
 
     # Format numbers and NA
     style.format(thousands=',', na_rep='⋯')
-    table_styles.append(
-        {
-            'selector': '',
-            'props': [
-                ('font-variant-numeric', 'tabular-nums'),
-                (
-                    'margin-top',
-                    '0' if margin_top == 0 else f'{margin_top}em',
-                ),
-                (
-                    'margin-bottom',
-                    '0' if margin_bottom == 0 else f'{margin_bottom}em',
-                ),
-            ],
-        }
+
+    # The table's own CSS is fixed but for the margins. Emit it as one inline
+    # declaration rather than as another rule for Styler to merge and scope.
+    top = '0' if margin_top == 0 else f'{margin_top}em'
+    bottom = '0' if margin_bottom == 0 else f'{margin_bottom}em'
+    style.set_table_attributes(
+        f'style="{_TABLE_CSS} margin-top: {top}; margin-bottom: {bottom};"'
     )
 
-    for v in all_columns(frame):
-        if pd.api.types.is_float_dtype(v.dtype):
-            minval = cast(pd.Series, v.data).abs().pipe(lambda c: c[c > 0].min())
-            logmin = 2 if pd.isna(minval) else math.ceil(math.log10(minval))
-            precision = max(min_precision, 3 - logmin)
+    # Only float columns need a custom precision, which often means none.
+    float_columns = [v for v in columns if v.dtype.kind == 'f']
+    if float_columns:
+        # Determine smallest positive magnitudes and their logarithms for all
+        # float columns at once.
+        magnitudes = frame.iloc[:, [v.position for v in float_columns]].abs()
+        minvals = (
+            magnitudes.where(magnitudes > 0)
+            .min()
+            .to_numpy(dtype=float, na_value=np.nan)
+        )
+        logmins = np.where(np.isnan(minvals), 2, np.ceil(np.log10(minvals)))
+        precisions = np.maximum(min_precision, 3 - logmins.astype(int))
+
+        for v, precision in zip(float_columns, precisions):
             style.format(
                 thousands=',',
                 na_rep='⋯',
-                precision=precision,
+                precision=int(precision),
                 subset=[v.name or v.position],
             )
 
@@ -225,10 +258,7 @@ def format_table(
         if isinstance(lowlight_columns, str):
             lowlight_columns = [lowlight_columns]
         style.set_table_styles(
-            {
-                c: [{ 'selector': '', 'props': [('color', '#999')] }]
-                for c in lowlight_columns
-            },
+            {c: _LOWLIGHT_STYLES for c in lowlight_columns},
             overwrite=False,
         )
 
@@ -237,10 +267,7 @@ def format_table(
         if not isinstance(highlight_rows, list):
             highlight_rows = [highlight_rows]
         style.set_table_styles(
-            {
-                r: [{'selector': '', 'props': [('background-color', '#feddb0')]}]
-                for r in highlight_rows
-            },
+            {r: _HIGHLIGHT_ROW_STYLES for r in highlight_rows},
             overwrite=False,
             axis=1,
         )
@@ -260,7 +287,7 @@ def format_table(
 
 def highlight_magnitude(
     frame: pd.DataFrame,
-    style: Styler,
+    style: 'Styler',
     *,
     column: str,
     threshold: float = 0,
@@ -269,8 +296,12 @@ def highlight_magnitude(
     high: float = 0,
     vmin: None | float = None,
     vmax: None | float = None,
-) -> Styler:
-    magnitude = frame[column].fillna(0).abs()
+) -> 'Styler':
+    # Copy the column once and then zero NaN and take absolute values in place.
+    magnitude = frame[column].to_numpy(dtype=float, na_value=np.nan, copy=True)
+    np.nan_to_num(magnitude, copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    np.abs(magnitude, out=magnitude)
+    # A positional mask selects rows without aligning on the frame's index.
     above_threshold = magnitude > threshold
     return style.background_gradient(
         cmap=colormap,
@@ -278,33 +309,52 @@ def highlight_magnitude(
         high=high,
         vmin=vmin,
         vmax=vmax,
-        gmap=magnitude,
-        subset=(above_threshold, frame.columns),  # type: ignore[arg-type]
+        # An ndarray gradient map must match the subset's rows.
+        gmap=magnitude[above_threshold],
+        subset=(above_threshold, list(frame.columns)),  # type: ignore[arg-type]
     )
 
 
 # --------------------------------------------------------------------------------------
 
 
-def format_schema(style: Styler) -> Styler:
-    style.format({'nulls': format_nulls})
-    style.set_table_styles(
-        [
-            {'selector': 'td', 'props': [('padding', '0.1em 1ex 0.1em 0')]},
-            {
-                'selector': 'td:nth-child(5)',
-                'props': [('padding-left', '0.4em'), ('text-align', 'start')],
-            },
-        ],
-        overwrite=False,
+_SCHEMA_CELL_CSS = 'padding: 0.1em 1ex 0.1em 0; text-align: start;'
+_SCHEMA_NULLS_CSS = 'padding: 0.1em 1ex 0.1em 0.4em; text-align: start;'
+
+
+def format_schema(
+    schema: pd.DataFrame, *, caption: str, margin_bottom: float = 2
+) -> str:
+    """
+    Format the schema produced by `to_schema()` as an HTML table. Since schemas
+    always have the same five columns, this function emits the markup directly
+    instead of going through Styler. The caption is HTML, too.
+    """
+    caption_css = ' '.join(f'{k}: {v};' for k, v in _caption_props(caption))
+    bottom = '0' if margin_bottom == 0 else f'{margin_bottom}em'
+
+    cell = f'<td style="{_SCHEMA_CELL_CSS}">'
+    rows = ''.join(
+        f'<tr>{cell}{kind}</td>{cell}{escape(name)}</td>{cell}{separator}</td>'
+        f'{cell}{escape(str(dtype))}</td>'
+        f'<td style="{_SCHEMA_NULLS_CSS}">{nulls}</td></tr>'
+        for kind, name, separator, dtype, nulls in schema.assign(
+            nulls=format_nulls(schema['nulls'])
+        ).itertuples(index=False)
+    )
+
+    return (
+        f'<table style="{_TABLE_CSS} margin-top: 0; margin-bottom: {bottom};">'
+        f'<caption style="{caption_css}">{caption}</caption>'
+        f'<tbody>{rows}</tbody></table>'
     )
-    return style
 
 
-def format_nulls(nulls: object) -> str:
-    count = cast(int, nulls)
-    quantity = 'no' if count == 0 else f'{count}'
-    return f'({quantity} null{"" if count == 1 else "s"})'
+def format_nulls(nulls: pd.Series) -> pd.Series:
+    """Format a column of null counts as, e.g., "(no nulls)" or "(1 null)"."""
+    quantity = nulls.astype(str).where(nulls != 0, 'no')
+    plural = np.where(nulls == 1, '', 's')
+    return '(' + quantity + ' null' + plural + ')'
 
 
 # --------------------------------------------------------------------------------------
@@ -316,14 +366,17 @@ class Vertical(NamedTuple):
     total: int
     name: None | str
     dtype: Dtype
-    data: pd.Index | pd.Series
+    frame: pd.DataFrame
+    selector: str
 
     @property
-    def selector(self) -> str:
-        if self.kind == 'index':
-            return f'.level{self.position}'
-        else:
-            return f'.col{self.position}'
+    def data(self) -> pd.Index | pd.Series:
+        """The vertical's data, which is only materialized when accessed."""
+        if self.kind == 'column':
+            return self.frame.iloc[:, self.position]
+        if self.total == 1:
+            return self.frame.index
+        return self.frame.index.get_level_values(self.position)
 
 
 def all_verticals(frame: pd.DataFrame) -> Iterator[Vertical]:
@@ -340,30 +393,34 @@ def all_levels(frame: pd.DataFrame) -> Iterator[Vertical]:
             1,
             frame.index.name,
             frame.index.dtype,
-            frame.index,
+            frame,
+            '.level0',
         )
     else:
         multi_index = cast(pd.MultiIndex, frame.index)
-        for level_index, dtype in enumerate(multi_index.dtypes):
+        levels = zip(multi_index.names, multi_index.dtypes.to_numpy())
+        for level_index, (name, dtype) in enumerate(levels):
             yield Vertical(
                 'index',
                 level_index,
                 nlevels,
-                multi_index.names[level_index],
+                name,
                 cast(Dtype, dtype),
-                multi_index.levels[level_index],
+                frame,
+                f'.level{level_index}',
             )
 
 
 def all_columns(frame: pd.DataFrame) -> Iterator[Vertical]:
-    ncolumns = frame.shape[0]
-    for column_index, dtype in enumerate(frame.dtypes):
-        name = frame.columns[column_index]
+    ncolumns = frame.shape[1]
+    columns = zip(frame.columns, frame.dtypes.to_numpy())
+    for column_index, (name, dtype) in enumerate(columns):
         yield Vertical(
             'column',
             column_index,
             ncolumns,
             None if name is None else str(name),
             cast(Dtype, dtype),
-            frame.iloc[:, column_index],
+            frame,
+            f'.col{column_index}',
         )
@@ -1,11 +1,12 @@
 from collections.abc import Sequence
 from enum import auto, StrEnum
-from functools import partial
+from functools import lru_cache, partial
 import itertools as it
 import math
 import textwrap
 from typing import cast
 
+import numpy as np
 import pandas as pd
 
 
@@ -16,6 +17,15 @@ def sgr(code: int | str) -> str:
     return f"\x1b[{code}m"
 
 
+_BOLD = sgr(1)
+_PLAIN = sgr(0)
+_HEADER_SHADE = sgr('48;5;253')
+_ROW_SHADE = sgr('48;5;255')
+_HIGHLIGHT = sgr('48;5;229')
+_DEFAULT_BACKGROUND = sgr('49')
+
+
+@lru_cache(maxsize=128)
 def _format_title(title: str, *, delta_percent: str) -> str:
     title = title.replace('_pct', ' percent')
     title = title.replace('_', ' ')
@@ -26,21 +36,43 @@ def _format_title(title: str, *, delta_percent: str) -> str:
     return title
 
 
-def _is_period(value: object) -> bool:
-    if not isinstance(value, pd.Period):
+_SIMPLE_PERIOD_FREQS = frozenset(('Q-DEC', 'Y', 'Y-DEC', 'A-DEC'))
+
+
+def _is_simple_period(column: pd.Series) -> bool:
+    """Determine whether the column holds quarters, halves, or years."""
+    if not isinstance(column.dtype, pd.PeriodDtype):
         return False
-    return value.freqstr in ('Q-DEC', '6M', 'Y')
+    freq = column.array.freqstr
+    if freq == '6M':
+        return bool(column.dropna().dt.month.isin((1, 7)).all())
+    return freq in _SIMPLE_PERIOD_FREQS
 
 
-def _format_period(value: object) -> str:
-    period = cast(pd.Period, value)
-    freq = period.freqstr
+def _format_periods(column: pd.Series, na: str) -> pd.Series:
+    """Format a column of simple periods, using na for missing values."""
+    freq = column.array.freqstr
+    present = column.notna().to_numpy()
+    years = column.dt.year.to_numpy()[present]
     if freq == 'Q-DEC':
-        return f'{period.year:04d} Q{period.month // 3:1d}'
+        months = column.dt.month.to_numpy()[present]
+        text = [f'{y:04d} Q{m // 3:1d}' for y, m in zip(years, months)]
     elif freq == '6M':
-        return f'{period.year:04d} H{period.month // 6:1d}'
+        months = column.dt.month.to_numpy()[present]
+        text = [f'{y:04d} H{m // 6:1d}' for y, m in zip(years, months)]
     else:
-        return str(period.year)
+        text = [str(y) for y in years]
+    out = np.full(len(column), na, dtype=object)
+    out[present] = text
+    return pd.Series(out, index=column.index, name=column.name)
+
+
+def _format_numbers(column: pd.Series, spec: str, na: str) -> pd.Series:
+    """Format a numeric column with the spec, using na for missing values."""
+    present = column.notna().to_numpy()
+    out = np.full(len(column), na, dtype=object)
+    out[present] = [format(v, spec) for v in column.array[present]]
+    return pd.Series(out, index=column.index, name=column.name)
 
 
 class _ColumnFormat(StrEnum):
@@ -57,20 +89,18 @@ _CF = _ColumnFormat
 def _format_column(column: pd.Series, na: str) -> tuple[_ColumnFormat, pd.Series]:
     if pd.api.types.is_bool_dtype(column.dtype):
         return _CF.BOOLEAN, column.apply(lambda v: 'true' if v else 'false')
-    elif pd.api.types.is_period_dtype(column.dtype):
-        return _CF.PERIOD, column.apply(_format_period)
+    elif _is_simple_period(column):
+        return _CF.PERIOD, _format_periods(column, na)
     elif pd.api.types.is_integer_dtype(column.dtype):
-        return _CF.INTEGER, column.apply(lambda v: na if pd.isna(v) else f'{v:,d}')
+        return _CF.INTEGER, _format_numbers(column, ',d', na)
     elif pd.api.types.is_float_dtype(column.dtype):
         # Pick a precision so that there is at least one digit after the decimal
         # and at least three significant digits are shown.
-        minval = column.abs().pipe(lambda c: c[c > 0].min())
-        logmin = 2 if pd.isna(minval) else math.ceil(math.log10(minval))
+        magnitudes = np.abs(column.to_numpy(dtype=float, na_value=np.nan))
+        magnitudes = magnitudes[magnitudes > 0]
+        logmin = 2 if magnitudes.size == 0 else math.ceil(math.log10(magnitudes.min()))
         precision = max(1, 3 - logmin)
-        return (
-            _CF.FLOAT,
-            column.apply(lambda v: na if pd.isna(v) else f'{v:.{precision}f}'),
-        )
+        return _CF.FLOAT, _format_numbers(column, f'.{precision}f', na)
     else:
         c = column.astype(str)
         # d = c.copy()
@@ -87,15 +117,21 @@ _OUTLIER_BINS = (-0.1, 5.0, 30.0, 100.0, math.inf)
 
 _OUTLIER_SGR = (
     None,
-    ('1;38;5;202', '39;0'),
-    ('1;38;5;160', '39;0'),
-    ('1;38;5;126', '39;0'),
+    (sgr('1;38;5;202'), sgr('39;0')),
+    (sgr('1;38;5;160'), sgr('39;0')),
+    (sgr('1;38;5;126'), sgr('39;0')),
 )
 
 
-def _maybe_has_outliers(data: pd.DataFrame) -> bool:
-    columns = data.columns
-    return 'reports' in columns and 'Δ%' in columns and 'NCMEC' in columns
+_REPORTS_COLUMNS = frozenset(('reports', 'Δ%', 'NCMEC'))
+
+
+def is_reports_table(data: pd.DataFrame) -> bool:
+    """
+    Determine whether the dataframe compares report counts with NCMEC's, i.e.,
+    has reports, Δ%, and NCMEC columns.
+    """
+    return all(c in data.columns for c in _REPORTS_COLUMNS)
 
 
 def _bin_outliers(percentages: pd.Series) -> pd.Series:
@@ -123,8 +159,8 @@ def _highlight_outliers_sgr(percentages: pd.Series, data: pd.DataFrame) -> pd.Da
         if codes is None:
             continue
 
-        data.at[row, 'reports'] = sgr(codes[0]) + data.at[row, 'reports']
-        data.at[row, 'NCMEC'] = data.at[row, 'NCMEC'] + sgr(codes[1])
+        data.at[row, 'reports'] = codes[0] + data.at[row, 'reports']
+        data.at[row, 'NCMEC'] = data.at[row, 'NCMEC'] + codes[1]
 
     return data
 
@@ -146,8 +182,8 @@ def _add_background_colors(
 
     # Process header.
     if use_rowshade:
-        header[header.columns[0]] = sgr('48;5;253') + header[header.columns[0]]
-        header[header.columns[-1]] = header[header.columns[-1]] + sgr('49')
+        header[header.columns[0]] = _HEADER_SHADE + header[header.columns[0]]
+        header[header.columns[-1]] = header[header.columns[-1]] + _DEFAULT_BACKGROUND
 
     # Process body.
     previous_column: None | str = None
@@ -158,32 +194,30 @@ def _add_background_colors(
 
         if not previous_highlight and current_highlight:
             # Enable highlight, which also disables rowshade for all rows.
-            body[column] = sgr('48;5;229') + body[column]
+            body[column] = _HIGHLIGHT + body[column]
 
         elif previous_highlight and not current_highlight:
             # Disable highlight for all rows in previous column.
             assert previous_column is not None
-            body[previous_column] = body[previous_column] + sgr('49')
+            body[previous_column] = body[previous_column] + _DEFAULT_BACKGROUND
             if use_rowshade:
                 # Enable rowshade in previous column, so that it covers column gap.
-                body.loc[1::2, previous_column] = body[previous_column] + sgr(
-                    '48;5;255'
-                )
+                body.loc[1::2, previous_column] = body[previous_column] + _ROW_SHADE
 
         elif previous_column is None and use_rowshade:
             # Enable rowshade in current column, which is the first column.
-            body.loc[1::2, column] = sgr('48;5;255') + body[column]
+            body.loc[1::2, column] = _ROW_SHADE + body[column]
 
         previous_column = column
         previous_highlight = current_highlight
 
     if previous_highlight:
         # Disable highlight in previous column, which is the last column.
-        body[previous_column] = body[previous_column] + sgr('49')
+        body[previous_column] = body[previous_column] + _DEFAULT_BACKGROUND
     elif use_rowshade:
         # Disable rowshade in previous column, which is the last column.
         assert previous_column is not None
-        body.loc[1::2, previous_column] = body[previous_column] + sgr('49')
+        body.loc[1::2, previous_column] = body[previous_column] + _DEFAULT_BACKGROUND
 
     return header, body
 
@@ -210,7 +244,9 @@ def format_text(
     titles = df.columns.to_series().apply(
         partial(_format_title, delta_percent=delta_percent)
     )
-    widths = titles.str.split().apply(lambda words: max(len(w) for w in words))
+    widths = pd.Series(
+        [max(map(len, title.split())) for title in titles], index=titles.index
+    )
 
     # Format columns, determine theirs widths, and combine with title widths.
     column_formats = {}
@@ -229,7 +265,7 @@ def format_text(
         index=titles.index,
     )
     # Normalize number of lines for each title by prepending empty lines.
-    line_count = titles.apply(lambda lines: len(lines)).max()
+    line_count = titles.str.len().max()
     header = pd.DataFrame(
         [[*it.repeat('', line_count - len(lines)), *lines] for lines in titles],
         index=titles.index,
@@ -258,7 +294,7 @@ def format_text(
 
     # Maybe highlight outliers. We colorize text before backgrounds,
     # since the latter may span more than one column.
-    if use_sgr and _maybe_has_outliers(df):
+    if use_sgr and is_reports_table(df):
         body = _highlight_outliers_sgr(df['Δ%'], body)
 
     # Maybe add row and column backgrounds
@@ -266,8 +302,8 @@ def format_text(
         header, body = _add_background_colors(header, body, use_rowshade, highlights)
 
     # Render down to string
-    bold = sgr('1') if use_sgr else ''
-    plain = sgr('0') if use_sgr else ''
+    bold = _BOLD if use_sgr else ''
+    plain = _PLAIN if use_sgr else ''
 
     text = (
         bold
@@ -302,7 +338,7 @@ def format_table(
 
     indent = ' ' * max(0, (width - len(title)) // 2 - 1)
     if use_sgr:
-        title = sgr(1) + title + sgr(0)
+        title = _BOLD + title + _PLAIN
     return indent + title + '\n\n' + text
 
 
@@ -324,8 +360,10 @@ def format_latex(df: pd.DataFrame) -> str:
 
 # if table.index.nlevels == 1:
 #     # Improve presentation of periods.
-#     if all(_is_period(value) for value in table.index.values):
-#         style.format_index(_format_period, axis=0)
+#     periods = table.index.to_series()
+#     if _is_simple_period(periods):
+#         labels = dict(zip(periods, _format_periods(periods, '')))
+#         style.format_index(labels.__getitem__, axis=0)
 # elif first_index_rules:
 #     # Improve presentation of tables with multi-indices.
 #     level_name = table.index.names[0]
@@ -1,8 +1,10 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 import re
-from typing import Literal, Self
+from typing import cast, Literal, Self
 
+import numpy as np
 import pandas as pd
 
 
@@ -10,6 +12,23 @@ _QUARTER_LABELS = ["Jan-Mar", "Apr-Jun", "Jul-Sep", "Oct-Dec"]
 _PERIOD_PATTERN = re.compile(rf"^(?:{'|'.join(_QUARTER_LABELS)}) 202[34]$")
 _ALT_PERIOD_PATTERN = re.compile(r"^202[34][qQ][1234]$")
 
+# The low-cardinality columns of TikTok's transparency disclosures. Reading them
+# as categories shrinks the data and turns equality tests into integer compares.
+# The Result column mixes counts with fractions and hence stays float64.
+SCHEMA = {
+    "Metric": "category",
+    "Period Type": "category",
+    "Period type": "category",
+    "Period": "category",
+    "Policy Type": "category",
+    "Policy type": "category",
+    "Task Type": "category",
+    "Task type": "category",
+    "Task": "category",
+    "Location": "category",
+    "Market": "category",
+}
+
 
 def parse_quarter(period: str | pd.Period) -> tuple[int, int]:
     if isinstance(period, pd.Period):
@@ -27,35 +46,75 @@ def parse_quarter(period: str | pd.Period) -> tuple[int, int]:
     return int(period[:4]), int(period[-1:])
 
 
+def _code_eq(column: pd.Series, value: str) -> np.ndarray:
+    """
+    Compare a categorical column against the given value. Instead of comparing
+    strings, this function looks up the value's code once and then compares the
+    column's integer codes.
+    """
+    categories = column.cat.categories
+    if value not in categories:
+        return np.zeros(len(column), dtype=bool)
+    return column.cat.codes.to_numpy() == categories.get_loc(value)
+
+
+@lru_cache(maxsize=16)
+def _read_disclosure(path: Path, mtime_ns: int) -> pd.DataFrame:
+    """
+    Read the TikTok disclosure at the given path. The parsed dataframe is cached
+    and shared between processors for the same quarter. Since the modification
+    time is part of the key, an updated file is read again.
+    """
+    return pd.read_csv(path, dtype=SCHEMA)
+
+
 @dataclass(frozen=True, slots=True)
 class Processor:
+    """
+    A TikTok disclosure for one quarter. The dataframe is shared between all
+    processors for the same quarter and must not be modified.
+    """
 
     year: int
     quarter: int
     status: Literal["all", "quarter", "shares"]
     data: pd.DataFrame
+    # Processors derived from this one, keyed by status. Since processors are
+    # immutable, filtering the data once suffices.
+    _derived: dict[str, "Processor"] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     @classmethod
     def for_period(cls, period: str | pd.Period, directory: None | Path = None) -> Self:
         year, quarter = parse_quarter(period)
         if directory is None:
             directory = Path(__file__).parent.parent / "data" / "tiktok"
-        path = directory / f"tiktok-{year}-q{quarter}.csv"
-        data = pd.read_csv(path)
+        path = (directory / f"tiktok-{year}-q{quarter}.csv").resolve()
+        data = _read_disclosure(path, path.stat().st_mtime_ns)
         return cls(year, quarter, "all", data)
 
     def quarter_only(self) -> Self:
         assert self.status == "all"
-        return type(self)(self.year, self.quarter, "quarter", self.data[
-            (self.data["Period"] == f"{_QUARTER_LABELS[self.quarter-1]} {self.year}")
-            & (self.data["Market"] == "All")
-            & (self.data["Task"] == "All")
-        ])
+        derived = self._derived.get("quarter")
+        if derived is None:
+            data = self.data
+            derived = type(self)(self.year, self.quarter, "quarter", data[
+                np.logical_and.reduce([
+                    _code_eq(
+                        data["Period"], f"{_QUARTER_LABELS[self.quarter-1]} {self.year}"
+                    ),
+                    _code_eq(data["Market"], "All"),
+                    _code_eq(data["Task"], "All"),
+                ])
+            ])
+            self._derived["quarter"] = derived
+        return cast(Self, derived)
 
     def total_videos_removed(self) -> int:
         """
         Retrieve the count of total videos removed. This processor must be
-        `focus()`ed before invoking this method.
+        restricted with `quarter_only()` before invoking this method.
         """
         assert self.status == "quarter"
         result = self.data.loc[self.data["Metric"] == "Total videos removed", "Result"]
@@ -64,11 +123,15 @@ class Processor:
 
     def category_shares(self) -> Self:
         assert self.status == "quarter"
-        return type(self)(self.year, self.quarter, "shares", self.data[
-            (self.data["Metric"] == "Category share")
-            & (self.data["Issue policy"].str.contains("Youth")
-               | (self.data["Issue policy"] == "Safety & Civility"))
-        ])
+        derived = self._derived.get("shares")
+        if derived is None:
+            derived = type(self)(self.year, self.quarter, "shares", self.data[
+                (self.data["Metric"] == "Category share")
+                & (self.data["Issue policy"].str.contains("Youth")
+                   | (self.data["Issue policy"] == "Safety & Civility"))
+            ])
+            self._derived["shares"] = derived
+        return cast(Self, derived)
 
     def stats(self) -> pd.DataFrame:
         assert self.status == "quarter"